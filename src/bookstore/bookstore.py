@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
-from typing import List, Optional
+from typing import ContextManager, Iterable, List, Optional, Tuple
 
 from bookstore.models.book import Book
 from bookstore.models.sale import Sale
@@ -14,7 +14,7 @@ from bookstore.services.sales_service import SalesService
 from bookstore.storage.json_store import JSONStore
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BookstoreStats:
     """Простий агрегат для відображення статистики у UI/тестах."""
 
@@ -32,12 +32,15 @@ class Bookstore:
     Єдина точка входу для UI: інкапсулює репозиторій, сервіси та сховище.
     """
 
-    def __init__(self, db_path: str | Path = "data/bookstore.json") -> None:
+    def __init__(
+        self, db_path: str | Path = "data/bookstore.json", *, durable: bool = False
+    ) -> None:
         """
         Args:
             db_path: шлях до JSON-файлу “БД”.
+            durable: робити fsync після кожного запису (повільніше, але переживає збій живлення).
         """
-        self._store = JSONStore(db_path)
+        self._store = JSONStore(db_path, durable=durable)
         self._repo = BookRepository(self._store)
         self._inventory = InventoryService(self._repo)
         self._sales = SalesService(self._repo, self._store)
@@ -109,6 +112,10 @@ class Bookstore:
         """
         return self._sales.sell(isbn=isbn, qty=qty)
 
+    def sell_many(self, items: Iterable[Tuple[str, int]]) -> List[Sale]:
+        """Продає кілька позицій [(isbn, qty), ...] одним записом; «все або нічого»."""
+        return self._sales.sell_many(items)
+
     def list_sales(self, *, isbn: Optional[str] = None, limit: int = 100) -> List[Sale]:
         return self._sales.list_sales(isbn=isbn, limit=limit)
 
@@ -127,15 +134,13 @@ class Bookstore:
           - кількість транзакцій продажів
           - сумарна виручка
         """
-        books = self._repo.list_all(include_archived=True)
-        total_titles = len(books)
-        active_titles = sum(1 for b in books if not b.archived)
+        # Агрегати каталогу репозиторій підтримує інкрементально — без проходу по книгах
+        total_titles, active_titles, total_quantity = self._repo.totals()
         archived_titles = total_titles - active_titles
-        total_quantity = sum(b.quantity for b in books)
 
-        sales = self._sales.list_sales(limit=None)
-        sales_count = len(sales)
-        revenue = self._sales.sales_total()
+        # Кількість і виручка — одним проходом по журналу продажів
+        sales_count, revenue_cents = self._sales.stats()
+        revenue = Decimal(revenue_cents).scaleb(-2)
 
         return BookstoreStats(
             total_titles=total_titles,
@@ -149,6 +154,28 @@ class Bookstore:
     # ──────────────────────────────────────────────────────────────
     # Технічне
 
+    def batch(self) -> ContextManager[None]:
+        """
+        Пакетний режим для масових операцій (наприклад, імпорту каталогу):
+        усі зміни всередині `with bookstore.batch():` записуються на диск один раз
+        на виході з блоку. Якщо блок впав із винятком — жодна зміна не зберігається.
+        """
+        return self._store.batch()
+
+    def compact(self) -> None:
+        """Переносить журнал продажів в основний JSON-файл (наприклад, раз на добу)."""
+        self._store.compact()
+
+    def close(self) -> None:
+        """Звільняє файлові дескриптори сховища (також на виході з `with Bookstore(...)`)."""
+        self._store.close()
+
+    def __enter__(self) -> "Bookstore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
     @property
     def db_path(self) -> Path:
         """Шлях до JSON-файлу з даними (для діагностики/тестів)."""
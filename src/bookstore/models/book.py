@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-import re
-import uuid
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from typing import Any, Dict
 
 from bookstore.errors import ValidationError
+from bookstore.models.ids import new_id
+from bookstore.validation import (
+    normalize_isbn,
+    validate_currency,
+    validate_isbn,
+    validate_non_empty,
+    validate_non_negative_int,
+    validate_positive_int,
+)
 
 
 class Book:
@@ -19,7 +26,20 @@ class Book:
     -  quantity: int >= 0
     """
 
-    _ISBN_RE = re.compile(r"^[0-9]{9}[0-9X]$|^[0-9]{13}$")
+    # Без __dict__ на кожен екземпляр: менше пам'яті й швидший доступ до атрибутів
+    __slots__ = (
+        "id",
+        "created_at",
+        "_title",
+        "_title_lc",
+        "_author",
+        "_author_lc",
+        "isbn",
+        "currency",
+        "_price_cents",
+        "quantity",
+        "archived",
+    )
 
     def __init__(
         self,
@@ -34,21 +54,38 @@ class Book:
         archived: bool = False,
         created_at: datetime | None = None,
     ):
-        self.id: str = book_id or str(uuid.uuid4())
+        self.id: str = book_id or new_id()
         self.created_at: datetime = created_at or datetime.now()
-        self.title = self._validate_non_empty("title", title)
-        self.author = self._validate_non_empty("author", author)
-        self.isbn: str = self._normalize_isbn(isbn)
-        if not self._ISBN_RE.match(self.isbn):
-            raise ValidationError("isbn", "Must be 10 or 13 digits")
-        self.currency: str = self._validate_currency(currency)
+        self.title = title
+        self.author = author
+        self.isbn: str = validate_isbn(normalize_isbn(isbn))
+        self.currency: str = validate_currency(currency)
         self._price_cents: int = self._to_cents(price)
-        self.quantity: int = self._validate_non_negative_int("quantity", quantity)
+        self.quantity: int = validate_non_negative_int("quantity", quantity)
         self.archived: bool = archived
 
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @title.setter
+    def title(self, value: str):
+        self._title = validate_non_empty("title", value)
+        # Кеш у нижньому регістрі для пошуку/сортування без алокацій на кожен запит
+        self._title_lc = self._title.lower()
+
+    @property
+    def author(self) -> str:
+        return self._author
+
+    @author.setter
+    def author(self, value: str):
+        self._author = validate_non_empty("author", value)
+        self._author_lc = self._author.lower()
+
     @property
     def price(self) -> Decimal:
-        return Decimal(self._price_cents) / Decimal(100)
+        return Decimal(self._price_cents).scaleb(-2)
 
     @price.setter
     def price(self, value: Decimal | float | str):
@@ -59,11 +96,11 @@ class Book:
         return self._price_cents
 
     def increase_stock(self, n: int):
-        inc = self._validate_positive_int("n", n)
+        inc = validate_positive_int("n", n)
         self.quantity += inc
 
     def decrease_stock(self, n: int):
-        dec = self._validate_positive_int("n", n)
+        dec = validate_positive_int("n", n)
         if dec > self.quantity:
             raise ValidationError(
                 "quantity", f"Cannot decrease by {dec}: only {self.quantity} in stock."
@@ -92,18 +129,22 @@ class Book:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Book":
         created_at = datetime.fromisoformat(data["created_at"]) if "created_at" in data else None
-        price = Decimal(int(data["price_cents"])) / Decimal(100)
-        return cls(
+        # Ціна вже зберігається в центах — ставимо її напряму, без кругообігу через Decimal
+        book = cls(
             title=data["title"],
             author=data["author"],
             isbn=data["isbn"],
-            price=price,
+            price=0,
             currency=data.get("currency", "USD"),
             quantity=int(data.get("quantity", 0)),
             book_id=data.get("id"),
             archived=bool(data.get("archived", False)),
             created_at=created_at,
         )
+        if "price_cents" not in data:
+            raise ValidationError("price_cents", "Missing")
+        book._price_cents = validate_non_negative_int("price_cents", int(data["price_cents"]))
+        return book
 
     def __repr__(self):
         return (
@@ -112,44 +153,31 @@ class Book:
             f"qty={self.quantity!r}, archived={self.archived!r})"
         )
 
+    def __copy__(self) -> "Book":
+        # Поверхнева копія без повторної валідації; усі поля незмінні (str/int/bool/datetime)
+        clone = Book.__new__(Book)
+        for name in Book.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
     def __eq__(self, other):
         if not isinstance(other, Book):
             return NotImplemented
         return self.id == other.id
 
-    @staticmethod
-    def _validate_non_empty(field: str, value: str) -> str:
-        if not isinstance(value, str) or not value.strip():
-            raise ValidationError(field, "Must be a non-empty string")
-        return value.strip()
-
-    @staticmethod
-    def _validate_non_negative_int(field: str, value: int) -> int:
-        if not isinstance(value, int) or value < 0:
-            raise ValidationError(field, "Must be a non-negative integer")
-        return value
-
-    @staticmethod
-    def _validate_positive_int(field: str, value: int) -> int:
-        if not isinstance(value, int) or value <= 0:
-            raise ValidationError(field, "Must be a positive integer")
-        return value
-
-    @staticmethod
-    def _validate_currency(value: str) -> str:
-        if not isinstance(value, str) or not value.strip():
-            raise ValidationError("currency", "Must be a non-empty string")
-        return value.strip().upper()
-
-    @staticmethod
-    def _normalize_isbn(raw: str) -> str:
-        if not isinstance(raw, str):
-            raise ValidationError("isbn", "ISBN must be a string")
-        cleaned = re.sub(r"[- ]", "", raw).upper()
-        return cleaned
-
     @staticmethod
     def _to_cents(amount: Decimal | float | str) -> int:
+        # Швидкі шляхи без створення проміжних Decimal/рядків
+        if isinstance(amount, int) and not isinstance(amount, bool):
+            if amount < 0:
+                raise ValidationError("price", "Must be >= 0")
+            return amount * 100
+        if isinstance(amount, Decimal):
+            exponent = amount.as_tuple().exponent
+            if isinstance(exponent, int) and exponent >= -2:
+                if amount < 0:
+                    raise ValidationError("price", "Must be >= 0")
+                return int(amount.scaleb(2))
         try:
             dec = Decimal(str(amount))
         except (InvalidOperation, ValueError):
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import itertools
+import os
+import uuid
+
+# Випадковий префікс процесу + монотонний лічильник: унікальні ідентифікатори
+# без звернення до os.urandom (uuid4) на кожну нову сутність.
+_prefix = uuid.uuid4().hex[:16]
+_counter = itertools.count()
+
+
+def new_id() -> str:
+    """Новий унікальний ідентифікатор виду '<16 hex префікса>-<12 hex лічильника>'."""
+    return f"{_prefix}-{next(_counter):012x}"
+
+
+def _reseed() -> None:
+    global _prefix, _counter
+    _prefix = uuid.uuid4().hex[:16]
+    _counter = itertools.count()
+
+
+if hasattr(os, "register_at_fork"):
+    # Дочірній процес після fork() не повинен повторювати ідентифікатори батьківського
+    os.register_at_fork(after_in_child=_reseed)
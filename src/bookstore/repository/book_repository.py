@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import re
-from typing import Iterable, List, Optional
+import copy
+import heapq
+from bisect import bisect_right
+from typing import Any, Dict, List, Tuple
 
 from bookstore.errors import BookNotFoundError, DuplicateISBNError, ValidationError
 from bookstore.models.book import Book
 from bookstore.storage.json_store import JSONStore
+from bookstore.validation import normalize_isbn
 
 
 class BookRepository:
@@ -16,116 +19,213 @@ class BookRepository:
     - працювати з моделями (Book) а не з сирими словниками
     """
 
-    _ISBN_CLEAN = re.compile(r"[- ]")
-
     def __init__(self, store: JSONStore):
         self._store = store
+        # Індекси розпарсених книг, прив'язані до знімка сховища.
+        # _by_id зберігає порядок книг у файлі.
+        self._by_id: Dict[str, Book] = {}
+        self._by_isbn: Dict[str, Book] = {}
+        # Сирі записи, які не вдалося розібрати в Book: у каталозі їх не видно,
+        # але при збереженні вони записуються назад без змін, а не губляться
+        self._unparsed: List[Dict[str, Any]] = []
+        self._snapshot_id: int | None = None
+        # Агрегати для статистики, що підтримуються інкрементально при кожній мутації
+        self._active_titles = 0
+        self._total_quantity = 0
+        # Колонковий індекс для пошуку (див. _search_columns); None — треба перебудувати
+        self._search_blob: str | None = None
+        self._blob_starts: List[int] = []
+        self._blob_books: List[Book] = []
+
+    def version(self) -> int:
+        """Версія даних: змінюється після кожної мутації чи зовнішньої зміни файлу."""
+        self._load_books()
+        assert self._snapshot_id is not None
+        return self._snapshot_id
+
+    def totals(self) -> Tuple[int, int, int]:
+        """(усього тайтлів, активних тайтлів, сумарний залишок) за O(1)."""
+        self._load_books()
+        return len(self._by_id), self._active_titles, self._total_quantity
 
     def list_all(self, *, include_archived: bool = True) -> List[Book]:
-        books = self._load_books()
-        if include_archived:
-            return books
-        return [b for b in books if not b.archived]
+        self._load_books()
+        return [
+            copy.copy(b) for b in self._by_id.values() if include_archived or not b.archived
+        ]
 
     def search(self, query: str, *, include_archived: bool = True, limit: int = 50) -> List[Book]:
+        """Повертає до `limit` перших за (назва, автор) книг, що містять запит."""
         q = query.strip().lower()
         if not q:
             return []
-        books = self.list_all(include_archived=include_archived)
-        results = []
-        for b in books:
-            if q in b.title.lower() or q in b.author.lower() or q in b.isbn.lower():
-                results.append(b)
-                if len(results) >= limit:
-                    break
-        results.sort(key=lambda x: (x.title.lower(), x.author.lower()))
-        return results
+        self._load_books()
+
+        if "\0" in q:
+            matches = [
+                b
+                for b in self._by_id.values()
+                if (include_archived or not b.archived)
+                and (q in b.isbn.lower() or q in b._title_lc or q in b._author_lc)
+            ]
+        else:
+            matches = self._scan_columns(q, include_archived)
+
+        # ISBN із дефісами/пробілами як підрядок не знайдеться — додаємо точний збіг з індексу
+        hit = self._by_isbn.get(normalize_isbn(q))
+        if (
+            hit is not None
+            and (include_archived or not hit.archived)
+            and not any(b is hit for b in matches)
+        ):
+            matches.append(hit)
+        # Купа розміром limit: O(N log K) замість сортування всіх збігів
+        top = heapq.nsmallest(limit, matches, key=lambda x: (x._title_lc, x._author_lc))
+        return [copy.copy(b) for b in top]
 
     def get_by_id(self, book_id: str) -> Book:
-        books = self._load_books()
-        for b in books:
-            if b.id == book_id:
-                return b
-        raise BookNotFoundError(book_id=book_id)
+        self._load_books()
+        try:
+            return copy.copy(self._by_id[book_id])
+        except KeyError:
+            raise BookNotFoundError(book_id=book_id) from None
 
     def get_by_isbn(self, isbn: str) -> Book:
-        norm = self._normalize_isbn(isbn)
-        books = self._load_books()
-        for b in books:
-            if b.isbn == norm:
-                return b
-        raise BookNotFoundError(isbn=norm)
+        norm = normalize_isbn(isbn)
+        self._load_books()
+        try:
+            return copy.copy(self._by_isbn[norm])
+        except KeyError:
+            raise BookNotFoundError(isbn=norm) from None
 
     def add(self, book: Book):
-        books = self._load_books()
-        if any(b.isbn == book.isbn for b in books):
+        self._load_books()
+        if book.isbn in self._by_isbn:
             raise DuplicateISBNError(book.isbn)
-        books.append(book)
-        self._save_books(books)
+        if book.id in self._by_id:
+            # Інакше старий запис лишився б в _by_isbn і двічі в агрегатах; для змін — update()
+            raise ValidationError("id", f"Book with id={book.id} already exists; use update()")
+        stored = copy.copy(book)
+        self._by_id[stored.id] = stored
+        self._by_isbn[stored.isbn] = stored
+        self._account(stored, +1)
+        self._save_books()
 
     def update(self, book: Book):
-        books = self._load_books()
-        idx = self._find_index_by_id(books, book.id)
-        if idx is None:
+        self._load_books()
+        current = self._by_id.get(book.id)
+        if current is None:
             raise BookNotFoundError(book_id=book.id)
-        for i, b in enumerate(books):
-            if i != idx and b.isbn == book.isbn:
-                raise DuplicateISBNError(book.isbn)
-        books[idx] = book
-        self._save_books(books)
+        other = self._by_isbn.get(book.isbn)
+        if other is not None and other.id != book.id:
+            raise DuplicateISBNError(book.isbn)
+        stored = copy.copy(book)
+        if current.isbn != stored.isbn:
+            del self._by_isbn[current.isbn]
+        self._by_id[stored.id] = stored
+        self._by_isbn[stored.isbn] = stored
+        self._account(current, -1)
+        self._account(stored, +1)
+        self._save_books()
 
     def remove(self, book_id: str):
-        books = self._load_books()
-        idx = self._find_index_by_id(books, book_id)
-        if idx is None:
+        self._load_books()
+        book = self._by_id.pop(book_id, None)
+        if book is None:
             raise BookNotFoundError(book_id=book_id)
-        del books[idx]
-        self._save_books(books)
+        if self._by_isbn.get(book.isbn) is book:
+            del self._by_isbn[book.isbn]
+        self._account(book, -1)
+        self._save_books()
 
     def archive_by_isbn(self, isbn: str):
-        books = self._load_books()
-        norm = self._normalize_isbn(isbn)
-        idx = self._find_index_by_isbn(books, norm)
-        if idx is None:
+        self._load_books()
+        norm = normalize_isbn(isbn)
+        book = self._by_isbn.get(norm)
+        if book is None:
             raise BookNotFoundError(isbn=norm)
 
-        book = books[idx]
+        self._account(book, -1)
         book.mark_archived()
-        books[idx] = book
-        self._save_books(books)
-
-    def _load_books(self) -> List[Book]:
-        data = self._store.load()
-        raw_books = data.get("books", [])
-        books = []
-        for item in raw_books:
+        self._account(book, +1)
+        self._save_books()
+
+    def _load_books(self) -> None:
+        """Перебудовує індекси, лише якщо знімок сховища змінився.
+        Назовні віддаються копії: зміни у викликача не потрапляють у кеш без update().
+        """
+        snapshot_id = self._store.snapshot_id()
+        if snapshot_id == self._snapshot_id:
+            return
+        by_id: Dict[str, Book] = {}
+        by_isbn: Dict[str, Book] = {}
+        unparsed: List[Dict[str, Any]] = []
+        # Споживаємо записи потоком прямо в індекси, без проміжного знімка load()
+        for item in self._store.iter_books():
             try:
-                books.append(Book.from_dict(item))
-            except ValidationError:
+                book = Book.from_dict(item)
+            except (ValidationError, KeyError, TypeError, ValueError):
+                unparsed.append(item)
                 continue
-        return books
-
-    def _save_books(self, books: Iterable[Book]):
-        data = self._store.load()
-        data["books"] = [b.to_dict() for b in books]
-        self._store.save(data)
-
-    @staticmethod
-    def _normalize_isbn(raw: str) -> str:
-        if not isinstance(raw, str):
-            raise ValidationError("isbn", "Must be a string")
-        return BookRepository._ISBN_CLEAN.sub("", raw).upper()
-
-    @staticmethod
-    def _find_index_by_id(books: List[Book], book_id: str) -> Optional[int]:
-        for index, book in enumerate(books):
-            if book.id == book_id:
-                return index
-        return None
-
-    @staticmethod
-    def _find_index_by_isbn(books: List[Book], isbn: str) -> Optional[int]:
-        for index, book in enumerate(books):
-            if book.isbn == isbn:
-                return index
-        return None
+            by_id[book.id] = book
+            by_isbn.setdefault(book.isbn, book)
+        self._by_id = by_id
+        self._by_isbn = by_isbn
+        self._unparsed = unparsed
+        self._search_blob = None  # навіть якщо нових книг немає і _account() не викликався
+        self._active_titles = 0
+        self._total_quantity = 0
+        for book in by_id.values():
+            self._account(book, +1)
+        self._snapshot_id = snapshot_id
+
+    def _save_books(self) -> None:
+        """Зберігає поточний стан індексів. Якщо запис не вдався — індекси
+        будуть перечитані з диска при наступному зверненні."""
+        try:
+            data = self._store.load()
+            data["books"] = [b.to_dict() for b in self._by_id.values()]
+            data["books"].extend(self._unparsed)
+            self._store.save(data)
+        except Exception:
+            self._snapshot_id = None
+            raise
+        self._snapshot_id = self._store.snapshot_id()
+
+    def _search_columns(self) -> Tuple[str, List[int], List[Book]]:
+        """
+        Пошукові поля всіх книг, складені в один рядок "isbn\\0назва\\0автор\\0..." (у нижньому
+        регістрі) плюс зсуви початку кожного запису. Підрядок шукає str.find у C одним
+        суцільним проходом замість трьох перевірок атрибутів на кожну книгу.
+        Будується ліниво й скидається при будь-якій мутації.
+        """
+        if self._search_blob is None:
+            books = list(self._by_id.values())
+            parts = [f"{b.isbn.lower()}\0{b._title_lc}\0{b._author_lc}\0" for b in books]
+            starts = [0]
+            for part in parts:
+                starts.append(starts[-1] + len(part))
+            self._search_blob = "".join(parts)
+            self._blob_starts = starts  # останній елемент — len(blob), сторож
+            self._blob_books = books
+        return self._search_blob, self._blob_starts, self._blob_books
+
+    def _scan_columns(self, q: str, include_archived: bool) -> List[Book]:
+        """Книги, у чиїх полях є підрядок q (q не містить '\\0', тож не перетинає межі полів)."""
+        blob, starts, books = self._search_columns()
+        found: List[Book] = []
+        pos = blob.find(q)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            book = books[i]
+            if include_archived or not book.archived:
+                found.append(book)
+            pos = blob.find(q, starts[i + 1])  # одразу до наступного запису
+        return found
+
+    def _account(self, book: Book, sign: int) -> None:
+        """Додає (sign=+1) або віднімає (sign=-1) внесок книги в агрегати."""
+        self._search_blob = None
+        if not book.archived:
+            self._active_titles += sign
+        self._total_quantity += sign * book.quantity
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
+import functools
 from decimal import Decimal
-from typing import List
+from typing import List, Tuple
 
 from bookstore.errors import BookNotFoundError, ValidationError
 from bookstore.models.book import Book
@@ -19,6 +21,9 @@ class InventoryService:
 
     def __init__(self, repo: BookRepository) -> None:
         self._repo = repo
+        # LRU-кеш пошуку для search-as-you-type; версія репозиторію входить у ключ,
+        # тож будь-яка мутація автоматично робить старі записи недосяжними
+        self._search_cached = functools.lru_cache(maxsize=256)(self._search_uncached)
 
     # ────────────────────────────────────────────────────────────────
     # Команди (mutations)
@@ -122,4 +127,14 @@ class InventoryService:
         self, query: str, *, include_archived: bool = False, limit: int = 50
     ) -> List[Book]:
         """Пошук за назвою/автором/ISBN (case-insensitive)."""
-        return self._repo.search(query, include_archived=include_archived, limit=limit)
+        query_lc = query.strip().lower()
+        if not query_lc:
+            return []
+        hits = self._search_cached(query_lc, include_archived, limit, self._repo.version())
+        return [copy.copy(b) for b in hits]
+
+    def _search_uncached(
+        self, query_lc: str, include_archived: bool, limit: int, version: int
+    ) -> Tuple[Book, ...]:
+        # version не використовується в тілі — це лише частина ключа кешу
+        return tuple(self._repo.search(query_lc, include_archived=include_archived, limit=limit))
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
+import heapq
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from bookstore.errors import OutOfStockError, ValidationError
 from bookstore.models.sale import Sale
 from bookstore.repository.book_repository import BookRepository
 from bookstore.storage.json_store import JSONStore
+from bookstore.validation import normalize_isbn, validate_isbn
 
 
 class SalesService:
     """
     Сервіс продажів:
-      - sell: списує товар, створює транзакцію Sale, зберігає її у JSONStore
+      - sell: списує товар, створює транзакцію Sale, дописує її у журнал JSONStore
+      - sell_many: кілька продажів одним записом на диск, за принципом «все або нічого»
       - list_sales: повертає транзакції з опційною фільтрацією за ISBN
       - sales_total: підсумовує виручку за всіма/обраним ISBN
+      - stats: кількість транзакцій і виручка за один прохід
     """
 
     def __init__(self, repo: BookRepository, store: JSONStore) -> None:
@@ -59,15 +63,22 @@ class SalesService:
         book.decrease_stock(qty)
         self._repo.update(book)
 
-        # 5) Записати транзакцію у журнал продажів (JSONStore)
-        data = self._store.load()
-        sales = data.get("sales", [])
-        sales.append(sale.to_dict())
-        data["sales"] = sales
-        self._store.save(data)
+        # 5) Дописати транзакцію у журнал продажів (без перезапису всього JSON)
+        self._store.append_sale(sale.to_dict())
 
         return sale
 
+    def sell_many(self, items: Iterable[Tuple[str, int]]) -> List[Sale]:
+        """
+        Продає кілька позицій [(isbn, qty), ...] в одному batch() сховища:
+        замість атомарного перезапису файлу на кожен продаж — один запис на виході
+        і одне дописування в журнал. Якщо будь-яка позиція не пройшла перевірки,
+        не зберігається жоден продаж — і всередині зовнішнього batch() теж
+        (вкладений batch() відкочується до точки входу).
+        """
+        with self._store.batch():
+            return [self.sell(isbn=isbn, qty=qty) for isbn, qty in items]
+
     # ───────────────────────────────────────────────────────────────
     # Запити (queries)
 
@@ -76,29 +87,41 @@ class SalesService:
         Повертає список транзакцій продажів.
         Опційно фільтрує за ISBN. Останні транзакції — наприкінці (за часом).
         """
-        data = self._store.load()
-        raw = data.get("sales", [])
-        sales: List[Sale] = [Sale.from_dict(d) for d in raw]
-
-        if isbn and isbn.strip():
-            # Тут ми використовуємо нормалізацію, яка має бути в моделі Sale,
-            # щоб не залежати від BookRepository.
-            norm_isbn = Sale._normalize_isbn(isbn)
-            sales = [s for s in sales if s.isbn == norm_isbn]
-
-        # Сортуємо за часом для стабільності від старих до нових
-        sales.sort(key=lambda s: s.timestamp)
+        # Спільна нормалізація з bookstore.validation; фільтруємо ще сирі записи.
+        norm_isbn = validate_isbn(normalize_isbn(isbn)) if isbn and isbn.strip() else None
+        raw = self._iter_raw_sales(norm_isbn)
+
+        # ISO-8601 мітки часу впорядковуються як рядки, тож datetime для сортування не потрібен
         if limit is not None and limit > 0:
-            sales = sales[-limit:]
-        return sales
+            # Лише `limit` найновіших: O(M log K); індекс зберігає порядок запису
+            # для однакових міток, як і стабільне сортування
+            top = heapq.nlargest(limit, enumerate(raw), key=lambda p: (p[1]["timestamp"], p[0]))
+            records = [d for _, d in reversed(top)]
+        else:
+            records = sorted(raw, key=lambda d: d["timestamp"])
+        # Журнал — наш власний вихід to_dict(), повторна валідація не потрібна
+        return [Sale._from_trusted_dict(d) for d in records]
 
     def sales_total(self, *, isbn: Optional[str] = None) -> Decimal:
         """
         Повертає сумарну виручку як Decimal.
         Якщо задано ISBN — агрегує лише по ньому.
         """
+        _, total_cents = self.stats(isbn=isbn)
+        return Decimal(total_cents).scaleb(-2)
+
+    def stats(self, *, isbn: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Повертає (кількість транзакцій, виручка в центах) за один прохід
+        по сирих записах журналу, не створюючи об'єктів Sale.
+        """
+        norm_isbn = validate_isbn(normalize_isbn(isbn)) if isbn and isbn.strip() else None
+        count = 0
         total_cents = 0
-        sales = self.list_sales(isbn=isbn, limit=None)
-        for s in sales:
-            total_cents += s.total_cents
-        return Decimal(total_cents) / Decimal(100)
+        for d in self._iter_raw_sales(norm_isbn):
+            count += 1
+            total_cents += int(d["qty"]) * int(d["unit_price_cents"])
+        return count, total_cents
+
+    def _iter_raw_sales(self, norm_isbn: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+        return self._store.iter_sales(isbn=norm_isbn)
@@ -1,42 +1,324 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import itertools
+import mmap
 import os
-import tempfile
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
 
 from bookstore.errors import StorageError
+from bookstore.storage import serialization
+from bookstore.storage.sales_journal import SalesJournal
+
+# Від цього розміру файл читається через mmap: парсер отримує сторінки з page cache
+# напряму, без копії всього файлу в bytes. Для дрібних файлів зайві syscalls не окупаються.
+_MMAP_THRESHOLD = 64 * 1024
+
+# Лічильник для імен тимчасових файлів: у межах процесу ім'я унікальне без випадкових
+# спроб, а pid в імені розводить процеси. O_EXCL у будь-якому разі не дасть перезаписати чуже.
+_tmp_counter = itertools.count()
+_TMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
+_TMP_FLAGS |= getattr(os, "O_BINARY", 0)  # Windows: інакше os.write перекодує '\n' у '\r\n'
 
 
 class JSONStore:
-    """Просте файлове сховище на базі JSON з атомарним записом"""
+    """Просте файлове сховище на базі JSON з атомарним записом.
+
+    Розпарсений вміст файлу кешується в пам'яті й інвалідується за (mtime, розмір, inode),
+    тож повторні load() без змін на диску не читають і не парсять файл.
+
+    Нові продажі дописуються в окремий журнал `<ім'я>.sales.ndjson` поруч із файлом,
+    а не переписують увесь JSON. Повний перелік продажів дає iter_sales():
+    спершу 'sales' з основного файлу, потім записи журналу. compact() переносить
+    накопичений журнал в основний файл.
 
-    def __init__(self, path: str | Path) -> None:
+    Усередині batch() записи відкладаються і виконуються один раз на виході з блоку.
+
+    Якщо шлях закінчується на .zst (наприклад, db.json.zst), файл стискається zstd —
+    для цього потрібен пакет zstandard. Журнал продажів лишається нестиснутим.
+
+    Файл пишеться компактно (без відступів); pretty=True вмикає відступи для налагодження.
+    durable=True додає fsync тимчасового файлу та директорії (і журналу після дописування):
+    запис переживає збій живлення, але кожен save() стає помітно дорожчим.
+    """
+
+    def __init__(self, path: str | Path, *, durable: bool = False, pretty: bool = False) -> None:
         self._path = Path(path)
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        if not self._path.exists():
-            self._atomic_write(self._default_data())
+        self._durable = durable
+        self._pretty = pretty
+        self._compressed = self._path.suffix == ".zst"
+        if self._compressed and not serialization.compression_available():
+            raise StorageError(f"{self._path}: *.zst stores require the 'zstandard' package")
+        stem = Path(self._path.stem).stem if self._compressed else self._path.stem
+        self._journal = SalesJournal(
+            self._path.with_name(stem + ".sales.ndjson"), durable=durable
+        )
+        self._cache: Dict[str, Any] | None = None
+        self._stat_key: Tuple[int, int, int] | None = None
+        self._version = 0
+        # (дайджест вмісту, stat-ключ) файлу, яким ми його востаннє записали чи прочитали:
+        # save() з тими самими байтами, поки файл не чіпали ззовні, нічого не пише
+        self._disk_digest: Tuple[bytes, Tuple[int, int, int]] | None = None
+        # ISBN -> продажі з основного файлу; будується раз на знімок, при першому запиті
+        self._base_sales_by_isbn: Dict[str, List[Dict[str, Any]]] | None = None
+        # Стан пакетного режиму (batch): відкладений запис файлу та продажів
+        self._batch_depth = 0
+        self._dirty = False
+        self._pending_sales: List[Dict[str, Any]] = []
+        # Конструктор не робить syscalls: директорія створюється перед першим записом,
+        # а порожній файл — при першому читанні, якщо його ще немає
+        self._initialized = False
 
     @property
     def path(self) -> Path:
         return self._path
 
     def load(self) -> Dict[str, Any]:
+        """Повертає знімок даних.
+        Списки 'books'/'sales' — нові (їх можна змінювати), а самі записи-словники
+        спільні з кешем, тому їх не можна змінювати на місці.
+        """
+        data = self._load_cached()
+        return {"books": list(data["books"]), "sales": list(data["sales"])}
+
+    def save(self, data: Dict[str, Any]):
+        data = self._validate_and_normalize(data, allow_missing=False)
+        if self._batch_depth:
+            self._remember(data, self._stat_key)
+            self._dirty = True
+            return
+        self._remember(data, self._atomic_write(data))
+
+    def append_sale(self, record: Dict[str, Any]):
+        """Дописує один продаж у журнал без перезапису основного файлу."""
+        self._ensure_initialized()
+        if self._batch_depth:
+            self._pending_sales.append(record)
+            return
+        self._journal.append(record)
+
+    def iter_books(self) -> Iterator[Dict[str, Any]]:
+        """Сирі записи книг з кешу — без копіювання списків, як у load()."""
+        return iter(self._load_cached()["books"])
+
+    def iter_sales(self, *, isbn: str | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Усі продажі: з основного файлу, а далі — з журналу (сирі словники).
+        Якщо задано нормалізований isbn — лише продажі цієї книги.
+        """
+        base = self._load_cached()["sales"]
+        pending = self._pending_sales
+        if isbn is not None:
+            base = self._base_sales_index().get(isbn, [])
+            pending = [d for d in pending if d.get("isbn") == isbn]
+        return itertools.chain(base, self._journal.scan(isbn=isbn), pending)
+
+    def compact(self):
+        """Переносить продажі з журналу в 'sales' основного файлу і обнуляє журнал.
+        Увесь перенос іде під виключним блокуванням журналу (див. SalesJournal), тож
+        продажі інших записувачів не губляться; на Windows блокування немає — там
+        компактацію можна запускати лише за одного записувача.
+        Якщо процес впаде між збереженням і обнуленням, записи журналу потраплять у файл
+        двічі, тому компактацію варто запускати періодично, а не після кожного продажу.
+        """
+        if self._batch_depth:
+            raise StorageError("compact() cannot run inside batch()")
+        self._ensure_initialized()
+        try:
+            with self._journal.locked(exclusive=True):
+                extra = list(self._journal)
+                if not extra:
+                    return
+                data = self.load()
+                data["sales"].extend(extra)
+                self.save(data)
+                self._journal.clear()
+        except OSError as e:
+            raise StorageError(f"Failed to lock sales journal {self._journal.path}: {e}", cause=e)
+
+    def close(self):
+        """Закриває дескриптори журналу продажів (сховищем можна користуватися й далі)."""
+        self._journal.close()
+        self._journal.close_lock()
+
+    def __enter__(self) -> "JSONStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Пакетний режим: усі save()/append_sale() всередині блоку зливаються
+        в один атомарний запис файлу та одне дописування в журнал на виході.
+        Якщо блок завершився винятком — відкладені зміни відкидаються.
+        Вкладені batch() приєднуються до зовнішнього, але мають власну точку відкату:
+        виняток у вкладеному блоці скасовує лише його зміни, навіть якщо зовнішній
+        код цей виняток перехопить і продовжить.
+        """
+        # Кеш не змінюється на місці (save() підставляє новий словник), тож посилання
+        # на нього разом з довжиною черги продажів — повноцінний знімок стану
+        savepoint = (
+            (self._cache, self._dirty, self._stat_key, len(self._pending_sales))
+            if self._batch_depth
+            else None
+        )
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if savepoint is None:
+                self._discard_pending()
+            else:
+                self._rollback_to(*savepoint)
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            self._flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        Знімок даних для змін на місці: `with store.transaction() as data: ...`.
+        На виході дані зберігаються одним атомарним записом (разом з усім, що зроблено
+        в тому ж batch()); якщо блок впав із винятком — зміни відкидаються.
+        """
+        with self.batch():
+            cached = self._load_cached()
+            # Записи-словники в кеші спільні; блоку віддаємо власні (пласкі) копії,
+            # щоб зміни на місці не потрапили в кеш, якщо блок завершиться винятком
+            data = {
+                "books": [dict(d) for d in cached["books"]],
+                "sales": [dict(d) for d in cached["sales"]],
+            }
+            yield data
+            self.save(data)
+
+    def snapshot_id(self) -> int:
+        """Ідентифікатор поточного знімка: змінюється, коли змінюється вміст сховища."""
+        self._load_cached()
+        return self._version
+
+    def _load_cached(self) -> Dict[str, Any]:
+        if self._dirty and self._cache is not None:
+            # Відкладені зміни новіші за файл на диску
+            return self._cache
+        if self._cache is not None:
+            # Один stat на звернення; без кешу його не робимо — все одно читати файл
+            try:
+                if self._file_key(os.stat(self._path)) == self._stat_key:
+                    return self._cache
+            except FileNotFoundError:
+                pass
+
         try:
-            with self._path.open("r", encoding="UTF-8") as f:
-                data = json.load(f)
+            with self._path.open("rb") as f:
+                # fstat відкритого файлу дає і розмір для вибору mmap, і ключ кешу
+                # саме того вмісту, який прочитали (навіть якщо файл тим часом замінили)
+                st = os.fstat(f.fileno())
+                key = self._file_key(st)
+                data = self._read_json(f, st.st_size, key)
         except FileNotFoundError:
             data = self._default_data()
-            self._atomic_write(data)
-        except json.JSONDecodeError as e:
+            key = self._atomic_write(data)
+        except ValueError as e:  # json.JSONDecodeError чи пошкоджений zstd-кадр
             raise StorageError(f"Corrupted JSON at {self._path}: {e}", cause=e)
 
-        return self._validate_and_normalize(data)
+        return self._remember(self._validate_and_normalize(data), key)
 
-    def save(self, data: Dict[str, Any]):
-        data = self._validate_and_normalize(data, allow_missing=False)
-        self._atomic_write(data)
+    @staticmethod
+    def _file_key(st: os.stat_result) -> Tuple[int, int, int]:
+        # Лише mtime недостатньо: два записи в межах одного тіку годинника ФС
+        # дають однаковий mtime, але майже завжди різні розмір чи inode (os.replace)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_json(self, f: BinaryIO, size: int, key: Tuple[int, int, int]) -> Any:
+        if self._compressed:
+            raw = serialization.decompress(f.read())
+            self._disk_digest = (self._digest(raw), key)
+            return serialization.loads(raw)
+        if size < _MMAP_THRESHOLD:
+            raw = f.read()
+            self._disk_digest = (self._digest(raw), key)
+            return serialization.loads(raw)
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                self._disk_digest = (self._digest(view), key)
+                return serialization.loads(view)
+
+    @staticmethod
+    def _digest(buf: bytes | memoryview) -> bytes:
+        # Некриптографічна задача — достатньо 64-бітного blake2b зі stdlib
+        return hashlib.blake2b(buf, digest_size=8).digest()
+
+    def _base_sales_index(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._base_sales_by_isbn is None:
+            index: Dict[str, List[Dict[str, Any]]] = {}
+            for d in self._load_cached()["sales"]:
+                record_isbn = d.get("isbn")
+                if isinstance(record_isbn, str):
+                    index.setdefault(record_isbn, []).append(d)
+            self._base_sales_by_isbn = index
+        return self._base_sales_by_isbn
+
+    def _remember(
+        self, data: Dict[str, Any], key: Tuple[int, int, int] | None
+    ) -> Dict[str, Any]:
+        """Кладе дані в кеш разом зі stat-ключем щойно записаного/прочитаного файлу."""
+        cache = {"books": list(data["books"]), "sales": list(data["sales"])}
+        self._cache = cache
+        self._base_sales_by_isbn = None
+        self._stat_key = key
+        self._version += 1
+        return cache
+
+    def _flush(self):
+        try:
+            if self._dirty and self._cache is not None:
+                self._stat_key = self._atomic_write(self._cache)
+                self._dirty = False
+            if self._pending_sales:
+                self._journal.extend(self._pending_sales)
+                self._pending_sales = []
+        except Exception:
+            self._discard_pending()
+            raise
+
+    def _rollback_to(
+        self,
+        cache: Dict[str, Any] | None,
+        dirty: bool,
+        stat_key: Tuple[int, int, int] | None,
+        pending_count: int,
+    ):
+        """Повертає стан вкладеного batch() до точки входу в нього."""
+        self._cache = cache
+        self._dirty = dirty
+        self._stat_key = stat_key
+        del self._pending_sales[pending_count:]
+        self._base_sales_by_isbn = None
+        self._version += 1  # читачі (репозиторій) мають перебудувати свої індекси
+
+    def _discard_pending(self):
+        """Відкидає відкладені зміни; наступний load() перечитає файл з диска."""
+        if self._dirty:
+            self._cache = None
+            self._dirty = False
+        self._pending_sales = []
+
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise StorageError(f"Failed to create directory for {self._path}: {e}", cause=e)
+        self._initialized = True
 
     @staticmethod
     def _default_data() -> Dict[str, Any]:
@@ -45,47 +327,103 @@ class JSONStore:
     def _validate_and_normalize(
         self, data: Dict[str, Any], *, allow_missing: bool = True
     ) -> Dict[str, Any]:
+        """Перевіряє структуру і повертає той самий словник (без перебудови).
+        Відсутні 'books'/'sales' дописуються на місці лише при allow_missing.
+        """
         if not isinstance(data, dict):
             raise StorageError("Root JSON must be an object {  ...  }")
         books = data.get("books")
         sales = data.get("sales")
 
         if books is None or sales is None:
-            if allow_missing:
-                if books is None:
-                    books = []
-                if sales is None:
-                    sales = []
-            else:
+            if not allow_missing:
                 raise StorageError("JSON must contain: 'books' and 'sales'")
+            if books is None:
+                books = data["books"] = []
+            if sales is None:
+                sales = data["sales"] = []
         if not isinstance(books, list) or not isinstance(sales, list):
             raise StorageError("'books' and 'sales' must be arrays")
-        return {"books": books, "sales": sales}
+        if allow_missing:
+            for book in books:
+                if isinstance(book, dict) and "price_cents" not in book and "price" in book:
+                    self._migrate_legacy_price(book)
+        return data
+
+    @staticmethod
+    def _migrate_legacy_price(book: Dict[str, Any]):
+        """Старий формат: ціна рядком ("12.34"). Переводимо в цілі центи один раз при читанні;
+        на диск новий формат потрапить із наступним save().
+        Нерозбірливу ціну лишаємо як є: такий запис, як і будь-який інший невалідний,
+        пропустить репозиторій, а решта сховища (зокрема продажі) лишиться читабельною."""
+        try:
+            cents = int((Decimal(str(book["price"])) * 100).quantize(Decimal("1")))
+        except (InvalidOperation, ValueError):
+            return
+        del book["price"]
+        book["price_cents"] = cents
 
-    def _atomic_write(self, data: Dict[str, Any]):
+    def _atomic_write(self, data: Dict[str, Any]) -> Tuple[int, int, int]:
         """Атомарний запис у файлах.
         1) пишемо у тимчасовий файл у тій же директорії
         2) os.replace() замінює оригінал
+        Повертає stat-ключ записаного файлу (rename не змінює ні inode, ні mtime).
         """
-        tmp_dir = str(self._path.parent)
-        tmp_name = ""  # Ініціалізуємо змінну
+        self._ensure_initialized()
+        tmp_name = ""
         try:
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                encoding="UTF-8",
-                dir=tmp_dir,
-                prefix=self._path.name + ".",
-                suffix=".tmp",
-                delete=False,
-            ) as tf:
-                json.dump(data, tf, ensure_ascii=False, indent=2)
-                tf.write("\n")
-                tmp_name = tf.name
+            # Кодуємо один раз у байти (з завершальним \n) і пишемо без текстової обгортки
+            buf = serialization.dumps(data, indent=self._pretty, newline=True)
+            digest = self._digest(buf)
+            if self._disk_digest is not None and self._disk_digest[0] == digest:
+                try:
+                    current = self._file_key(os.stat(self._path))
+                except FileNotFoundError:
+                    current = None
+                if current == self._disk_digest[1]:
+                    return current  # на диску вже саме ці байти — запис не потрібен
+            if self._compressed:
+                buf = serialization.compress(buf)
+            # Напряму через os.open: без реєстру/фіналізатора й перебору випадкових імен
+            while True:
+                candidate = f"{self._path}.{os.getpid()}.{next(_tmp_counter)}.tmp"
+                try:
+                    fd = os.open(candidate, _TMP_FLAGS, 0o644)
+                    break
+                except FileExistsError:
+                    continue  # залишок від впалого процесу з тим самим pid
+            tmp_name = candidate
+            try:
+                # Готовий буфер іде прямо в os.write(): без копії у буфер файлового об'єкта
+                view = memoryview(buf)
+                written = 0
+                while written < len(view):
+                    written += os.write(fd, view[written:])
+                if self._durable:
+                    os.fsync(fd)
+                key = self._file_key(os.fstat(fd))
+            finally:
+                os.close(fd)
             os.replace(tmp_name, self._path)
+            tmp_name = ""
+            if self._durable:
+                self._fsync_dir()
+            self._disk_digest = (digest, key)
+            return key
         except Exception as e:
             try:
-                if tmp_name and os.path.exists(tmp_name):
+                if tmp_name:
                     os.remove(tmp_name)
             except OSError:
                 pass
             raise StorageError(f"Failed to write JSON to {self._path}: {e}", cause=e)
+
+    def _fsync_dir(self):
+        """fsync директорії, щоб сам rename теж потрапив на диск (де ОС це підтримує)."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return  # Windows: директорію так не відкрити
+        dfd = os.open(self._path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from bookstore.errors import StorageError
+from bookstore.storage import serialization
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: flock недоступний
+    fcntl = None  # type: ignore[assignment]
+
+
+class SalesJournal:
+    """Журнал продажів у форматі NDJSON (один JSON-об'єкт на рядок).
+    Записи лише дописуються в кінець файлу, тож продаж коштує O(1) байтів запису
+    незалежно від розміру каталогу та історії продажів.
+
+    Для вибірок за ISBN тримається інвертований індекс ISBN -> зсуви рядків у файлі.
+    Він добудовується ліниво: при кожному запиті індексується лише нова частина журналу.
+
+    Дескриптор для дописування відкривається при першому записі й тримається відкритим
+    до close() (або до збирання об'єкта сміттям); якщо файл журналу замінили
+    чи видалили ззовні — він перевідкривається.
+
+    Кілька записувачів (сховищ чи процесів) на одному шляху узгоджуються через flock
+    на сусідньому файлі `<журнал>.lock`: дописування беруть спільне блокування,
+    а перенесення журналу в основний файл (JSONStore.compact) — виключне, тож продаж
+    не загубиться між читанням журналу та його обнуленням. Там, де fcntl немає
+    (Windows), блокування не діє і компактацію можна запускати лише за одного записувача.
+    """
+
+    def __init__(self, path: str | Path, *, durable: bool = False) -> None:
+        self._path = Path(path)
+        self._durable = durable
+        self._isbn_index: Dict[str, List[int]] = {}
+        self._indexed_size = 0
+        self._indexed_file: Tuple[int, int] | None = None  # (st_dev, st_ino)
+        self._fd: int | None = None
+        self._fd_file: Tuple[int, int] | None = None  # (st_dev, st_ino) відкритого файлу
+        self._fd_finalizer: weakref.finalize | None = None
+        self._lock_fd: int | None = None
+        self._lock_finalizer: weakref.finalize | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, record: Dict[str, Any]):
+        self.extend([record])
+
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """Дописує кілька записів одним write()."""
+        buf = b"".join([serialization.dumps(r, newline=True) for r in records])
+        if not buf:
+            return
+        try:
+            with self.locked():
+                fd, size = self._append_fd()
+                if size and self._last_byte(fd, size) != b"\n":
+                    # Попередній запис обірвався посеред рядка (збій процесу). Без роздільника
+                    # новий рядок приклеївся б до обірваного, і обидва стали б нечитабельними
+                    buf = b"\n" + buf
+                # memoryview: при частковому write() хвіст передається без копіювання буфера
+                view = memoryview(buf)
+                written = 0
+                while written < len(view):
+                    written += os.write(fd, view[written:])
+                if self._durable:
+                    os.fsync(fd)
+        except OSError as e:
+            raise StorageError(f"Failed to append sale to {self._path}: {e}", cause=e)
+
+    @contextmanager
+    def locked(self, *, exclusive: bool = False) -> Iterator[None]:
+        """Рекомендаційне блокування журналу: спільне для дописувань, виключне для компактації."""
+        if fcntl is None:
+            yield
+            return
+        fd = self._open_lock()
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def clear(self):
+        """
+        Обнуляє журнал (після того як його записи перенесено в основний файл).
+        Викликати під locked(exclusive=True), інакше чужий продаж може загубитися.
+        Порожній файл підставляється через os.replace, а не ftruncate: новий inode
+        сигналізує іншим читачам (і процесам), що їхні індекси зсувів застаріли.
+        """
+        self.close()  # дескриптор старого inode; на Windows відкритий файл не замінити
+        tmp_name = f"{self._path}.{os.getpid()}.clear.tmp"
+        try:
+            with open(tmp_name, "wb"):
+                pass
+            os.replace(tmp_name, self._path)
+        except OSError as e:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+            raise StorageError(f"Failed to truncate sales journal {self._path}: {e}", cause=e)
+        self._isbn_index = {}
+        self._indexed_size = 0
+        self._indexed_file = None
+
+    def close(self):
+        if self._fd_finalizer is not None:
+            self._fd_finalizer()  # закриває дескриптор рівно один раз
+            self._fd_finalizer = None
+        self._fd = None
+        self._fd_file = None
+
+    def close_lock(self):
+        if self._lock_finalizer is not None:
+            self._lock_finalizer()
+            self._lock_finalizer = None
+        self._lock_fd = None
+
+    def _open_lock(self) -> int:
+        if self._lock_fd is None:
+            flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+            fd = os.open(f"{self._path}.lock", flags, 0o644)
+            self._lock_finalizer = weakref.finalize(self, os.close, fd)
+            self._lock_fd = fd
+        return self._lock_fd
+
+    @staticmethod
+    def _last_byte(fd: int, size: int) -> bytes:
+        # lseek+read замість os.pread, якого немає на Windows. Позиція читання
+        # на запис не впливає: з O_APPEND кожен write() однаково йде в кінець файлу
+        os.lseek(fd, size - 1, os.SEEK_SET)
+        return os.read(fd, 1)
+
+    def _append_fd(self) -> Tuple[int, int]:
+        """
+        Постійний O_APPEND-дескриптор і поточний розмір файлу:
+        один stat замість open()+close() на кожен запис.
+        """
+        try:
+            st: os.stat_result | None = os.stat(self._path)
+        except FileNotFoundError:
+            st = None
+        if self._fd is not None and st is not None and self._fd_file == (st.st_dev, st.st_ino):
+            return self._fd, st.st_size
+        self.close()
+        # O_APPEND: ядро саме ставить позицію в кінець файлу перед кожним write();
+        # O_RDWR — щоб можна було перевірити останній байт; O_BINARY — без перекодування
+        # '\n' на Windows
+        flags = os.O_RDWR | os.O_CREAT | os.O_APPEND
+        flags |= getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+        fd = os.open(self._path, flags, 0o644)
+        # Страховка від витоку, якщо власник забуде викликати close()
+        self._fd_finalizer = weakref.finalize(self, os.close, fd)
+        st = os.fstat(fd)
+        self._fd, self._fd_file = fd, (st.st_dev, st.st_ino)
+        return fd, st.st_size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.scan()
+
+    def scan(self, *, isbn: str | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Читає журнал через mmap: ОС підтягує сторінки на вимогу,
+        а в пам'яті Python одночасно живе лише один рядок.
+        Якщо задано isbn (нормалізований), читаються лише рядки з індексу цього ISBN —
+        O(k) для k його продажів замість проходу по всьому журналу.
+        """
+        try:
+            f = self._path.open("rb")
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if not st.st_size:
+                return  # mmap не вміє відображати порожній файл
+            with mmap.mmap(f.fileno(), st.st_size, access=mmap.ACCESS_READ) as mm:
+                if isbn is None:
+                    for offset, line in self._lines(mm, 0, st.st_size):
+                        record = self._decode(line)
+                        if record is not None:
+                            yield record
+                    return
+
+                self._index_tail(mm, st)
+                for offset in list(self._isbn_index.get(isbn, ())):
+                    record = self._decode(mm[offset : mm.find(b"\n", offset)])
+                    if record is not None:
+                        yield record
+
+    def _index_tail(self, mm: mmap.mmap, st: os.stat_result):
+        """Доіндексовує рядки, дописані після попереднього запиту."""
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._indexed_file or st.st_size < self._indexed_size:
+            # Файл замінено або обрізано — індекс будуємо заново
+            self._isbn_index = {}
+            self._indexed_size = 0
+            self._indexed_file = file_id
+        for offset, line in self._lines(mm, self._indexed_size, st.st_size):
+            record = self._decode(line)
+            if record is not None and isinstance(record.get("isbn"), str):
+                self._isbn_index.setdefault(record["isbn"], []).append(offset)
+            self._indexed_size = offset + len(line) + 1
+
+    @staticmethod
+    def _lines(mm: mmap.mmap, start: int, size: int) -> Iterator[Tuple[int, bytes]]:
+        """(зсув, рядок) для кожного завершеного рядка; обірваний хвіст ігнорується."""
+        pos = start
+        while pos < size:
+            end = mm.find(b"\n", pos, size)
+            if end == -1:
+                break
+            yield pos, mm[pos:end]
+            pos = end + 1
+
+    @staticmethod
+    def _decode(line: bytes) -> Dict[str, Any] | None:
+        """Запис із рядка; None для порожнього чи пошкодженого рядка (напр. обірваного
+        збоєм запису) — один битий рядок не повинен робити нечитабельним увесь журнал."""
+        if not line.strip():
+            return None
+        try:
+            record = serialization.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return record if isinstance(record, dict) else None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson є необов'язковою залежністю
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard потрібен лише для файлів *.zst
+    zstandard = None  # type: ignore[assignment]
+
+_ZSTD_LEVEL = 3
+
+# Енкодери stdlib створюються один раз, а не на кожен dumps().
+# check_circular=False: книги й продажі — дерева без циклів, обхід графа зайвий.
+_COMPACT_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":")
+)
+_PRETTY_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, indent=2, separators=(",", ": ")
+)
+
+
+def loads(raw: str | bytes | memoryview) -> Any:
+    """
+    Парсить JSON: через orjson (C, у рази швидше), якщо він встановлений, інакше stdlib.
+    Приймає й байти — UTF-8 декодується всередині парсера, без проміжного str.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)  # приймає memoryview (напр. над mmap) без копіювання
+    if isinstance(raw, memoryview):
+        raw = raw.tobytes()
+    return json.loads(raw)
+
+
+def dumps(obj: Any, *, indent: bool = False, newline: bool = False) -> bytes:
+    """
+    Серіалізує в UTF-8 байти (без екранування не-ASCII).
+    Без indent — компактно, без пробілів; newline=True додає завершальний '\\n'.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, option=option)
+    text = (_PRETTY_ENCODER if indent else _COMPACT_ENCODER).encode(obj)
+    if newline:
+        text += "\n"
+    return text.encode("UTF-8")
+
+
+def compression_available() -> bool:
+    return zstandard is not None
+
+
+def compress(buf: bytes) -> bytes:
+    """Стискає zstd (рівень 3). Об'єкти (де)компресора не потокобезпечні — створюємо на виклик."""
+    return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(buf)
+
+
+def decompress(raw: bytes | memoryview) -> bytes:
+    """
+    Розпаковує один чи кілька zstd-кадрів. Потоковий reader, а не decompress():
+    кадри, записані в потоковому режимі (`... | zstd > db.json.zst`),
+    не мають розміру вмісту в заголовку.
+    """
+    try:
+        with zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True) as reader:
+            return reader.read()
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Invalid zstd data: {e}") from e
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from bookstore.errors import ValidationError
+
+# Таблиця видалення роздільників для str.translate — швидше за re.sub на коротких рядках
+_ISBN_STRIP = str.maketrans("", "", "- \t\n\r\f\v")
+
+
+def normalize_isbn(raw: str) -> str:
+    """Прибирає дефіси/пробіли та переводить у верхній регістр (без перевірки формату)."""
+    if not isinstance(raw, str):
+        raise ValidationError("isbn", "Must be a string")
+    return raw.translate(_ISBN_STRIP).upper()
+
+
+def validate_isbn(isbn: str) -> str:
+    """Перевіряє нормалізований ISBN: 10 символів (останній може бути X) або 13 цифр."""
+    # Перемикач за довжиною + str.isdigit() замість регулярного виразу.
+    # isascii() обов'язковий: isdigit() приймає й не-ASCII цифри ('٣', '²').
+    n = len(isbn)
+    if n == 13:
+        ok = isbn.isascii() and isbn.isdigit()
+    elif n == 10:
+        ok = isbn.isascii() and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == "X")
+    else:
+        ok = False
+    if not ok:
+        raise ValidationError("isbn", "Must be 10 or 13 digits")
+    return isbn
+
+
+def validate_non_empty(field: str, value: str) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ValidationError(field, "Must be a non-empty string")
+    return value.strip()
+
+
+def validate_currency(value: str) -> str:
+    return validate_non_empty("currency", value).upper()
+
+
+def validate_positive_int(field: str, value: int) -> int:
+    if not isinstance(value, int) or value <= 0:
+        raise ValidationError(field, "Must be a positive integer")
+    return value
+
+
+def validate_non_negative_int(field: str, value: int) -> int:
+    if not isinstance(value, int) or value < 0:
+        raise ValidationError(field, "Must be a non-negative integer")
+    return value
+
+
+__all__ = [
+    "normalize_isbn",
+    "validate_isbn",
+    "validate_non_empty",
+    "validate_currency",
+    "validate_positive_int",
+    "validate_non_negative_int",
+]
@@ -1,6 +1,6 @@
 import pytest
 
-from bookstore.errors import BookNotFoundError, DuplicateISBNError
+from bookstore.errors import BookNotFoundError, DuplicateISBNError, ValidationError
 from bookstore.models.book import Book
 from bookstore.repository.book_repository import BookRepository
 from bookstore.storage.json_store import JSONStore
@@ -63,3 +63,162 @@ def test_archive_and_remove(tmp_path):
 
     with pytest.raises(BookNotFoundError):
         repo.get_by_id(b2.id)
+
+
+def test_returned_books_are_detached_from_cache(tmp_path):
+    """Тестує, що зміни отриманої книги без update() не впливають на репозиторій."""
+    repo = make_repo(tmp_path)
+    repo.add(Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=3))
+
+    book = repo.get_by_isbn("9780321125217")
+    book.quantity = 0
+    assert repo.get_by_isbn("9780321125217").quantity == 3
+
+    repo.update(book)
+    assert repo.get_by_isbn("9780321125217").quantity == 0
+
+
+def test_update_isbn_keeps_indexes_consistent(tmp_path):
+    """
+    Тестує:
+    - зміну ISBN через update()
+    - пошук за новим ISBN і відсутність старого
+    - заборону дублікату ISBN при оновленні
+    """
+    repo = make_repo(tmp_path)
+    a = Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00")
+    b = Book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00")
+    repo.add(a)
+    repo.add(b)
+
+    a.isbn = "9780132350884"
+    repo.update(a)
+    assert repo.get_by_isbn("9780132350884").id == a.id
+    with pytest.raises(BookNotFoundError):
+        repo.get_by_isbn("9780321125217")
+
+    b.isbn = "9780132350884"
+    with pytest.raises(DuplicateISBNError):
+        repo.update(b)
+    assert [x.id for x in repo.list_all()] == [a.id, b.id]
+
+
+def test_search_case_insensitive_sorted_and_archived_filter(tmp_path):
+    """
+    Тестує:
+    - регістронезалежний пошук за назвою/автором/ISBN
+    - сортування результатів за назвою
+    - виключення архівних книг
+    """
+    repo = make_repo(tmp_path)
+    repo.add(Book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00"))
+    repo.add(Book(title="Patterns of EAA", author="Fowler", isbn="0321127420", price="20.00"))
+    repo.add(Book(title="Java Puzzlers", author="Bloch", isbn="032133678X", price="9.00"))
+
+    assert [b.title for b in repo.search("FOWLER")] == ["Patterns of EAA", "Refactoring"]
+    assert [b.title for b in repo.search("678x")] == ["Java Puzzlers"]
+
+    repo.archive_by_isbn("0321127420")
+    assert [b.title for b in repo.search("fowler", include_archived=False)] == ["Refactoring"]
+
+
+def test_search_limit_keeps_alphabetical_top(tmp_path):
+    """
+    Тестує:
+    - що limit повертає перші за алфавітом збіги, а не перші у файлі
+    - пошук за повним ISBN з дефісами
+    """
+    repo = make_repo(tmp_path)
+    repo.add(Book(title="C", author="Knuth", isbn="9780201485677", price="1.00"))
+    repo.add(Book(title="B", author="Knuth", isbn="9780321125217", price="1.00"))
+    repo.add(Book(title="A", author="Knuth", isbn="9780132350884", price="1.00"))
+
+    assert [b.title for b in repo.search("knuth", limit=2)] == ["A", "B"]
+    assert [b.title for b in repo.search("978-0321125217")] == ["B"]
+
+
+def test_totals_track_mutations(tmp_path):
+    """Тестує, що агрегати (тайтли/активні/залишок) збігаються з повним перерахунком."""
+    repo = make_repo(tmp_path)
+    a = Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=3)
+    b = Book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00", quantity=2)
+    repo.add(a)
+    repo.add(b)
+    assert repo.totals() == (2, 2, 5)
+
+    a.quantity = 0
+    repo.update(a)
+    repo.archive_by_isbn(a.isbn)
+    assert repo.totals() == (2, 1, 2)
+
+    repo.remove(b.id)
+    assert repo.totals() == (1, 0, 0)
+    assert make_repo(tmp_path).totals() == (1, 0, 0)
+
+
+def test_search_index_follows_mutations(tmp_path):
+    """Тестує, що пошук бачить додавання, перейменування, архівацію і видалення книг."""
+    repo = make_repo(tmp_path)
+    ddd = Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00")
+    repo.add(ddd)
+    assert [b.isbn for b in repo.search("0321")] == ["9780321125217"]
+    assert repo.search("evans\0ddd") == []
+
+    repo.add(Book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00"))
+    assert [b.title for b in repo.search("9780")] == ["DDD", "Refactoring"]
+
+    renamed = repo.get_by_isbn("9780321125217")
+    renamed.title = "Domain-Driven Design"
+    repo.update(renamed)
+    assert repo.search("ddd") == []
+    assert [b.title for b in repo.search("driven")] == ["Domain-Driven Design"]
+
+    repo.archive_by_isbn("9780201485677")
+    assert repo.search("fowler", include_archived=False) == []
+    assert len(repo.search("fowler")) == 1
+
+    repo.remove(ddd.id)
+    assert repo.search("evans") == []
+
+
+def test_book_records_keep_canonical_key_order_on_disk(tmp_path):
+    """Тестує, що поля книги у файлі йдуть у фіксованому порядку Book.to_dict, без сортування."""
+    repo = make_repo(tmp_path)
+    book = Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=1)
+    repo.add(book)
+
+    on_disk = JSONStore(tmp_path / "db.json").load()["books"][0]
+    assert list(on_disk) == list(book.to_dict())
+    assert list(on_disk)[:4] == ["id", "title", "author", "isbn"]
+
+
+def test_search_by_full_isbn_also_matches_titles(tmp_path):
+    """Тестує, що пошук за повним ISBN-13 знаходить і книги, у назві яких є цей рядок."""
+    repo = make_repo(tmp_path)
+    repo.add(Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00"))
+    repo.add(
+        Book(title="Notes on 9780321125217", author="Reader", isbn="9780201485677", price="1.00")
+    )
+
+    assert [b.title for b in repo.search("9780321125217")] == ["DDD", "Notes on 9780321125217"]
+    repo.archive_by_isbn("9780321125217")
+    assert [b.title for b in repo.search("9780321125217", include_archived=False)] == [
+        "Notes on 9780321125217"
+    ]
+    assert len(repo.search("9780321125217")) == 2
+
+
+def test_add_rejects_existing_id_and_keeps_indexes_consistent(tmp_path):
+    """Тестує, що повторне add() книги з тим самим id (але новим ISBN) відхиляється без змін."""
+    repo = make_repo(tmp_path)
+    book = Book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=3)
+    repo.add(book)
+
+    book.isbn = "9780201485677"
+    with pytest.raises(ValidationError):
+        repo.add(book)
+
+    assert repo.totals() == (1, 1, 3)
+    assert repo.get_by_isbn("9780321125217").id == book.id
+    with pytest.raises(BookNotFoundError):
+        repo.get_by_isbn("9780201485677")
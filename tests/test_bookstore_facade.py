@@ -1,5 +1,9 @@
+import gc
+import os
 from decimal import Decimal
 
+import pytest
+
 from bookstore.bookstore import Bookstore
 
 
@@ -27,3 +31,80 @@ def test_facade_e2e(tmp_path):
     assert stats.total_quantity == 1
     assert stats.sales_count == 1
     assert stats.revenue == Decimal("11.00")
+
+
+def test_batch_writes_once_and_discards_on_error(tmp_path):
+    """
+    Тестує пакетний режим:
+    - зміни видно всередині блоку, але файл пишеться лише на виході
+    - при винятку всередині блоку нічого не зберігається
+    """
+    bs = Bookstore(db_path=tmp_path / "db.json")
+    bs.list_all()  # файл створюється ліниво, при першому зверненні
+    before = bs.db_path.read_bytes()
+
+    with bs.batch():
+        bs.add_book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=3)
+        bs.add_book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00")
+        bs.sell(isbn="9780321125217", qty=1)
+        assert bs.get_book_by_isbn(isbn="9780321125217").quantity == 2
+        assert bs.db_path.read_bytes() == before
+
+    fresh = Bookstore(db_path=tmp_path / "db.json")
+    assert fresh.stats().total_titles == 2
+    assert fresh.stats().sales_count == 1
+
+    try:
+        with bs.batch():
+            bs.sell(isbn="9780321125217", qty=2)
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+
+    assert bs.get_book_by_isbn(isbn="9780321125217").quantity == 2
+    assert bs.stats().sales_count == 1
+
+
+def test_search_forgets_books_from_aborted_batch(tmp_path):
+    """Тестує, що після відкату batch() пошук не знаходить книгу, якої вже немає в каталозі."""
+    bs = Bookstore(db_path=tmp_path / "db.json")
+    try:
+        with bs.batch():
+            bs.add_book(title="DDD", author="Evans", isbn="9780321125217", price="15.00")
+            assert len(bs.search("evans")) == 1
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+
+    assert bs.list_all() == []
+    assert bs.search("evans") == []
+
+
+def test_close_and_context_manager_release_journal_fd(tmp_path):
+    """Тестує, що close()/with і збирання сміттям закривають дескриптор журналу продажів."""
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("потрібен /proc/self/fd")
+
+    def journal_fds() -> int:
+        count = 0
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                target = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError:
+                continue
+            count += target.startswith(str(tmp_path)) and target.endswith((".ndjson", ".lock"))
+        return count
+
+    with Bookstore(db_path=tmp_path / "a.json") as bs:
+        bs.add_book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=5)
+        bs.sell(isbn="9780321125217", qty=1)
+        assert journal_fds() == 2  # журнал і його .lock
+    assert journal_fds() == 0
+
+    for i in range(20):
+        other = Bookstore(db_path=tmp_path / f"b{i}.json")
+        other.add_book(title="DDD", author="Evans", isbn="9780321125217", price="15.00")
+        other.sell(isbn="9780321125217", qty=1)
+    del other
+    gc.collect()
+    assert journal_fds() == 0
@@ -40,3 +40,67 @@ def test_sale_create_and_totals():
     assert s.unit_price == Decimal("12.34")
     assert s.total_cents == 2468
     assert s.total == Decimal("24.68")
+
+
+def test_book_price_cents_conversion_and_roundtrip():
+    b = Book(title="X", author="Y", isbn="0132350882", price=11)
+    assert b.price_cents == 1100
+
+    b.price = Decimal("12.3")
+    assert b.price_cents == 1230
+
+    b.price = "1.005"  # повільний шлях із банківським округленням
+    assert b.price_cents == 100
+
+    with pytest.raises(ValidationError):
+        b.price = -1
+
+    restored = Book.from_dict(b.to_dict())
+    assert restored.price_cents == 100
+    assert restored.price == Decimal("1.00")
+
+
+def test_models_use_slots_and_book_copy_is_detached():
+    import copy
+
+    b = Book(title="X", author="Y", isbn="0132350882", price="1.00", quantity=1)
+    assert not hasattr(b, "__dict__")
+    clone = copy.copy(b)
+    clone.quantity = 5
+    assert b.quantity == 1 and clone == b
+
+    s = Sale.create(book_id="abc", isbn="0132350882", qty=1, unit_price_cents=1, currency="USD")
+    assert not hasattr(s, "__dict__")
+
+
+def test_generated_ids_are_unique():
+    ids = {Book(title="X", author="Y", isbn="0132350882", price="1.00").id for _ in range(100)}
+    ids |= {
+        Sale.create(book_id="b", isbn="0132350882", qty=1, unit_price_cents=1, currency="USD").sale_id
+        for _ in range(100)
+    }
+    assert len(ids) == 200
+
+
+def test_sale_timestamp_is_iso_string_parsed_lazily():
+    from datetime import datetime
+
+    ts = datetime(2024, 5, 1, 12, 30)
+    s = Sale.create(
+        book_id="abc", isbn="0132350882", qty=1, unit_price_cents=1, currency="USD", timestamp=ts
+    )
+    assert s.timestamp == "2024-05-01T12:30:00"
+    assert s.timestamp_dt == ts
+    assert Sale.from_dict(s.to_dict()) == s
+
+
+@pytest.mark.parametrize(
+    "isbn", ["013235088", "01323508821", "X132350882", "01323508XX", "97801323508٨٤", "978013235088X"]
+)
+def test_book_rejects_malformed_isbn(isbn):
+    with pytest.raises(ValidationError):
+        Book(title="X", author="Y", isbn=isbn, price="1.00")
+
+
+def test_book_accepts_isbn10_with_check_x():
+    assert Book(title="X", author="Y", isbn="0-8044-2957-x", price="1.00").isbn == "080442957X"
@@ -1,3 +1,4 @@
+import os
 from decimal import Decimal
 
 import pytest
@@ -52,3 +53,91 @@ def test_out_of_stock(tmp_path):
 
     with pytest.raises(OutOfStockError):
         sales.sell(isbn="978-0321125217", qty=5)
+
+
+def test_sales_total_filters_by_isbn(tmp_path):
+    """Тестує підсумок виручки загалом і з фільтром за ISBN."""
+    inv, sales, _ = make_services(tmp_path)
+    inv.add_book(title="DDD", author="Evans", isbn="978-0321125217", price="15.00", quantity=5)
+    inv.add_book(title="Clean Code", author="Bob", isbn="978-0132350884", price="10.00", quantity=5)
+
+    sales.sell(isbn="978-0321125217", qty=2)
+    sales.sell(isbn="978-0132350884", qty=1)
+
+    assert sales.sales_total() == Decimal("40.00")
+    assert sales.sales_total(isbn="978-0321125217") == Decimal("30.00")
+    assert sales.sales_total(isbn="0132350882") == Decimal("0")
+
+
+def test_list_sales_limit_returns_latest_in_time_order(tmp_path):
+    """Тестує, що limit повертає найновіші транзакції, впорядковані від старих до нових."""
+    store = JSONStore(tmp_path / "db.json")
+    sales = SalesService(BookRepository(store), store)
+    for sale_id, ts in [("b", "2024-01-02T10:00:00"), ("a", "2024-01-01T10:00:00"),
+                        ("d", "2024-01-04T10:00:00"), ("c", "2024-01-03T10:00:00")]:
+        store.append_sale({
+            "sale_id": sale_id, "book_id": "x", "isbn": "9780321125217", "qty": 1,
+            "unit_price_cents": 100, "currency": "USD", "timestamp": ts,
+        })
+
+    assert [s.sale_id for s in sales.list_sales(limit=2)] == ["c", "d"]
+    assert [s.sale_id for s in sales.list_sales(limit=None)] == ["a", "b", "c", "d"]
+    assert sales.list_sales(isbn="0132350882") == []
+
+
+def test_search_cache_invalidated_by_mutation(tmp_path):
+    """Тестує, що кешований пошук бачить зміни після мутацій каталогу."""
+    inv, _, _ = make_services(tmp_path)
+    inv.add_book(title="DDD", author="Evans", isbn="978-0321125217", price="15.00", quantity=1)
+    assert [b.title for b in inv.search_books("evans")] == ["DDD"]
+    assert [b.title for b in inv.search_books("  Evans ")] == ["DDD"]
+
+    inv.add_book(title="DDD Reference", author="Evans", isbn="978-1457501197", price="5.00")
+    assert [b.title for b in inv.search_books("evans")] == ["DDD", "DDD Reference"]
+
+    inv.set_quantity(isbn="978-0321125217", new_qty=0)
+    inv.archive_if_empty(isbn="978-0321125217")
+    assert [b.title for b in inv.search_books("evans")] == ["DDD Reference"]
+
+
+def test_sell_many_writes_once_and_is_all_or_nothing(tmp_path, monkeypatch):
+    """Тестує, що sell_many робить один атомарний запис, а при помилці не зберігає жодного продажу."""
+    inv, sales, repo = make_services(tmp_path)
+    inv.add_book(title="DDD", author="Evans", isbn="978-0321125217", price="15.00", quantity=5)
+    inv.add_book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00")
+
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda a, b: replaced.append(b) or real_replace(a, b))
+
+    sold = sales.sell_many([("978-0321125217", 2), ("9780201485677", 1), ("9780321125217", 1)])
+    assert [s.qty for s in sold] == [2, 1, 1]
+    assert len(replaced) == 1
+    assert repo.get_by_isbn("9780321125217").quantity == 2
+    assert sales.sales_total() == Decimal("56.00")
+
+    with pytest.raises(OutOfStockError):
+        sales.sell_many([("9780321125217", 1), ("9780201485677", 1)])
+    assert repo.get_by_isbn("9780321125217").quantity == 2
+    assert len(sales.list_sales()) == 3
+
+
+def test_sell_many_failure_inside_outer_batch_rolls_back_only_its_items(tmp_path):
+    """Тестує, що невдалий sell_many у зовнішньому batch() не лишає своїх продажів і списань."""
+    store = JSONStore(tmp_path / "db.json")
+    repo = BookRepository(store)
+    inv = InventoryService(repo)
+    sales = SalesService(repo, store)
+    inv.add_book(title="DDD", author="Evans", isbn="9780321125217", price="15.00", quantity=3)
+    inv.add_book(title="Refactoring", author="Fowler", isbn="9780201485677", price="11.00")
+
+    with store.batch():
+        sales.sell(isbn="9780201485677", qty=1)
+        with pytest.raises(OutOfStockError):
+            sales.sell_many([("9780321125217", 1), ("9780321125217", 5)])
+        assert repo.get_by_isbn("9780321125217").quantity == 3
+
+    fresh = BookRepository(JSONStore(tmp_path / "db.json"))
+    assert fresh.get_by_isbn("9780321125217").quantity == 3
+    assert fresh.get_by_isbn("9780201485677").quantity == 0
+    assert [s.isbn for s in sales.list_sales()] == ["9780201485677"]